@@ -4,24 +4,119 @@ Fetches data at DeSO level from Statistics Sweden (SCB) and performs
 socioeconomic analysis similar to the RegSO level analysis.
 """
 
+import hashlib
+import os
+import pathlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
 from pxstatspy import PxAPI, PxAPIConfig, OutputFormat, OutputFormatParam
 
+# Label columns in the API responses used for grouping and merging
+KEY_COLUMNS = ('region_code', 'region', 'utbildningsniva', 'ar', 'kon', 'alder')
+
+# Dtype of the indicator percentage columns, independent of the values returned by the API
+INDICATOR_DTYPE = "double[pyarrow]"
+
+# Descriptions of area types 1-5, in area type order
+AREA_TYPE_DESCRIPTIONS = [
+    "Områden med stora socioekonomiska utmaningar",
+    "Områden med socioekonomiska utmaningar",
+    "Socioekonomiskt blandade områden",
+    "Områden med goda socioekonomiska förutsättningar",
+    "Områden med mycket goda socioekonomiska förutsättningar"
+]
+
 class DesoAnalyzer:
     """Class for fetching and analyzing DeSO level socioeconomic data"""
     
-    def __init__(self):
+    def __init__(self, use_disk_cache=True, cache_dir=None):
         """
         Initialize the DesoAnalyzer with SCB API client
+
+        Args:
+            use_disk_cache: If True, API responses are stored on disk and reused
+                across runs instead of being downloaded again
+            cache_dir: Directory for the disk cache (defaults to ~/.cache/desocioek)
         """
         # Set up SCB API client
-        config = PxAPIConfig(
+        self.config = PxAPIConfig(
             base_url="https://statistikdatabasen.scb.se/api/v2",
             language="sv"
         )
-        self.client = PxAPI(config)
-        self.cache = {}  # Cache for storing fetched data
+        self.client = PxAPI(self.config)
+        self.cache = {}  # Cache for storing fetched data, keyed by (indicator, frozenset of years)
+        self._cache_lock = threading.Lock()  # Fetchers may run concurrently
+
+        # Persistent cache for raw API responses
+        self.use_disk_cache = use_disk_cache
+        if cache_dir is None:
+            cache_dir = pathlib.Path.home() / ".cache" / "desocioek"
+        self.cache_dir = pathlib.Path(cache_dir)
+
+    def _get_data(self, table_id, value_codes):
+        """
+        Fetch DeSO level data for a table, using the disk cache when possible
+
+        Args:
+            table_id: SCB table id
+            value_codes: Dictionary of value codes to select
+
+        Returns:
+            DataFrame with the API response as Arrow-backed columns, with key
+            columns as categoricals
+        """
+        region_type = "deso"
+        cache_path = None
+        df = None
+
+        if self.use_disk_cache:
+            # Sort the years so the same selection in a different order shares one entry
+            key_codes = dict(value_codes)
+            if "Tid" in key_codes:
+                key_codes["Tid"] = sorted(key_codes["Tid"])
+            key = hashlib.sha1(
+                repr((table_id, key_codes, region_type, self.config.language)).encode()
+            ).hexdigest()
+            cache_path = self.cache_dir / f"{key}.parquet"
+
+            if cache_path.exists():
+                try:
+                    df = pd.read_parquet(cache_path)
+                    print(f"Loaded {table_id} from disk cache")
+                except Exception as e:
+                    print(f"Warning: Could not read cached data for {table_id}, fetching again: {e}")
+
+        if df is None:
+            df = self.client.get_data_as_dataframe(
+                table_id=table_id,
+                value_codes=value_codes,
+                region_type=region_type,  # Filter for DeSO regions only
+                clean_colnames=True
+            )
+
+            if cache_path is not None:
+                try:
+                    self.cache_dir.mkdir(parents=True, exist_ok=True)
+                    # Write to a temporary file first so an interrupted run never
+                    # leaves a partial cache entry behind
+                    tmp_path = cache_path.with_suffix(".tmp")
+                    df.to_parquet(tmp_path, index=False)
+                    os.replace(tmp_path, cache_path)
+                except Exception as e:
+                    print(f"Warning: Could not write disk cache for {table_id}: {e}")
+
+        # Use Arrow-backed columns for faster string operations and nullable numbers.
+        # Keep floats as floats even when every value happens to be a whole number
+        df = df.convert_dtypes(dtype_backend="pyarrow", convert_integer=False)
+
+        # Store repeated labels as categoricals so grouping works on integer codes
+        for col in KEY_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype("category")
+
+        return df
     
     def fetch_educational_level(self, years):
         """
@@ -35,22 +130,25 @@ class DesoAnalyzer:
         """
         table_id = "TAB5956"
     
+        # Reuse cached data if it covers the requested years
+        cached_df = self._get_cached("educational_level", years)
+        if cached_df is not None:
+            return cached_df
+
         print(f"Fetching educational level data for years: {years}")
     
         # Convert years to strings if they are not already
         years_str = [str(year) for year in years]
     
         try:
-            df = self.client.get_data_as_dataframe(
+            df = self._get_data(
                 table_id=table_id,
                 value_codes={
                     "Tid": years_str,
                     "Region": ["*"],  # All regions
                     "UtbildningsNiva": ["*"],  # All education levels
                     "ContentsCode": ["000005MO"]
-                },
-                region_type="deso",  # Filter for DeSO regions only
-                clean_colnames=True
+                }
             )
         
             # Filter for pre-high school education ("förgymnasial utbildning")
@@ -59,36 +157,33 @@ class DesoAnalyzer:
             # Create a pivot table to calculate the percentage with pre-high school education
             # First, check if we need to filter the education level
             if 'utbildningsniva' in df.columns:
-                # Filter for only pre-high school education rows
-                pre_high_school = df[df['utbildningsniva'].str.contains('förgymnasial', case=False, na=False)]
-            
-                # Group by region and year
-                regional_data = pre_high_school.groupby(['region_code', 'region', 'ar']).agg({
-                    'befolkning': 'sum'  # Sum the population with pre-high school education
-                }).reset_index()
-            
-                # Now get the total population by region and year
-                total_pop = df.groupby(['region_code', 'region', 'ar']).agg({
-                    'befolkning': 'sum'  # Sum all education levels
-                }).reset_index()
-            
-                # Merge and calculate percentage
-                merged = pd.merge(
-                    regional_data,
-                    total_pop,
-                    on=['region_code', 'region', 'ar'],
-                    suffixes=('_pre_high_school', '_total')
-                )
-            
-                # Calculate percentage (0-100)
-                merged['education_percentage'] = (merged['befolkning_pre_high_school'] / 
-                                             merged['befolkning_total'] * 100)
-            
+                # Identify the pre-high school education levels once, on the handful of
+                # distinct level labels instead of on every row
+                levels = df['utbildningsniva'].dropna().unique()
+                pre_high_school_levels = [level for level in levels if level.lower().startswith('förgymnasial')]
+                is_pre_high_school = df['utbildningsniva'].isin(pre_high_school_levels).to_numpy()
+
+                # Population with pre-high school education (0 for all other levels)
+                df['befolkning_pre_high_school'] = df['befolkning'].where(is_pre_high_school, 0)
+
+                # Sum pre-high school and total population by region and year in a single pass.
+                # region_code identifies the region, so the name is carried along instead of grouped on
+                merged = df.groupby(['region_code', 'ar'], sort=False, observed=True).agg(
+                    region=('region', 'first'),
+                    befolkning_pre_high_school=('befolkning_pre_high_school', 'sum'),
+                    befolkning_total=('befolkning', 'sum')
+                ).reset_index()
+
+                # Calculate percentage (0-100), popping the sums so they are not kept around
+                merged['education_percentage'] = (merged.pop('befolkning_pre_high_school')
+                                                  .div(merged.pop('befolkning_total')) * 100).astype(INDICATOR_DTYPE)
+
                 # Select only the needed columns
                 result_df = merged[['region_code', 'region', 'ar', 'education_percentage']]
             
                 # Cache the result
-                self.cache["educational_level"] = result_df
+                with self._cache_lock:
+                    self.cache[("educational_level", frozenset(years_str))] = result_df
             
                 return result_df
             else:
@@ -114,22 +209,25 @@ class DesoAnalyzer:
         """
         table_id = "TAB6436"
     
+        # Reuse cached data if it covers the requested years
+        cached_df = self._get_cached("economic_standard", years)
+        if cached_df is not None:
+            return cached_df
+
         print(f"Fetching economic standard data for years: {years}")
     
         # Convert years to strings if they are not already
         years_str = [str(year) for year in years]
     
         try:
-            df = self.client.get_data_as_dataframe(
+            df = self._get_data(
                 table_id=table_id,
                 value_codes={
                     "Tid": years_str,
                     "Region": ["*"],  # All regions
                     "Alder": ["tot"],  # Total age group
                     "ContentsCode": ["000007OQ"]
-                },
-                region_type="deso",  # Filter for DeSO regions only
-                clean_colnames=True
+                }
             )
         
             print(f"Processing economic standard data for {len(df)} rows")
@@ -153,16 +251,19 @@ class DesoAnalyzer:
         
             # Create a standardized result dataframe
             result_df = df[['region_code', 'region', 'ar']].copy()
-            result_df['low_economic_standard_percentage'] = df[percentage_col]
+            result_df['low_economic_standard_percentage'] = df[percentage_col].astype(INDICATOR_DTYPE)
         
             # Verify the values are in percentage format (0-100)
-            if result_df['low_economic_standard_percentage'].max() <= 1.0:
+            # (max is NA for an empty or all-null Arrow column, so check for it first)
+            max_value = result_df['low_economic_standard_percentage'].max()
+            if pd.notna(max_value) and max_value <= 1.0:
                 # Convert from proportion to percentage
                 print("Converting low economic standard from proportion to percentage")
                 result_df['low_economic_standard_percentage'] *= 100
         
             # Cache the result
-            self.cache["economic_standard"] = result_df
+            with self._cache_lock:
+                self.cache[("economic_standard", frozenset(years_str))] = result_df
         
             return result_df
         
@@ -184,13 +285,18 @@ class DesoAnalyzer:
         """
         table_id = "TAB5551"
     
+        # Reuse cached data if it covers the requested years
+        cached_df = self._get_cached("unemployment_rate", years)
+        if cached_df is not None:
+            return cached_df
+
         print(f"Fetching unemployment rate data for years: {years}")
     
         # Convert years to strings if they are not already
         years_str = [str(year) for year in years]
     
         try:
-            df = self.client.get_data_as_dataframe(
+            df = self._get_data(
                 table_id=table_id,
                 value_codes={
                     "Tid": years_str,
@@ -198,9 +304,7 @@ class DesoAnalyzer:
                     "Kon": ["1+2"],  # Both men and women
                     "Alder": ["20-64"],  # Age group 20-64 years
                     "ContentsCode": ["0000079T", "0000077H"]
-                },
-                region_type="deso",  # Filter for DeSO regions only
-                clean_colnames=True
+                }
             )
         
             print(f"Processing unemployment data for {len(df)} rows")
@@ -210,15 +314,20 @@ class DesoAnalyzer:
             if 'antal_arbetslosa' in df.columns and 'antal_sysselsatta_och_arbetslosa_arbetskraften' in df.columns:
                 # Calculate unemployment rate as percentage (0-100)
                 df['unemployment_rate_percentage'] = (df['antal_arbetslosa'] / 
-                                                df['antal_sysselsatta_och_arbetslosa_arbetskraften'] * 100)
+                                                df['antal_sysselsatta_och_arbetslosa_arbetskraften'] * 100).astype(INDICATOR_DTYPE)
             
-                # Group by region and year to handle any duplicates
-                result_df = df.groupby(['region_code', 'region', 'ar']).agg({
-                    'unemployment_rate_percentage': 'mean'  # Mean in case of multiple values
-                }).reset_index()
+                result_df = df[['region_code', 'region', 'ar', 'unemployment_rate_percentage']]
+
+                # Group by region and year only if there are duplicates to handle
+                if result_df.duplicated(subset=['region_code', 'ar']).any():
+                    result_df = result_df.groupby(['region_code', 'ar'], sort=False, observed=True).agg(
+                        region=('region', 'first'),
+                        unemployment_rate_percentage=('unemployment_rate_percentage', 'mean')  # Mean in case of multiple values
+                    ).reset_index()[['region_code', 'region', 'ar', 'unemployment_rate_percentage']]
             
                 # Cache the result
-                self.cache["unemployment_rate"] = result_df
+                with self._cache_lock:
+                    self.cache[("unemployment_rate", frozenset(years_str))] = result_df
             
                 return result_df
             else:
@@ -247,15 +356,68 @@ class DesoAnalyzer:
         Returns:
             Dictionary with DataFrames for each indicator
         """
-        results = {}
-    
-        # Fetch all three indicators
-        results["educational_level"] = self.fetch_educational_level(years)
-        results["economic_standard"] = self.fetch_economic_standard(years)
-        results["unemployment_rate"] = self.fetch_unemployment_rate(years)
-    
+        fetchers = {
+            "educational_level": self.fetch_educational_level,
+            "economic_standard": self.fetch_economic_standard,
+            "unemployment_rate": self.fetch_unemployment_rate
+        }
+
+        # Fetch all three indicators concurrently - the requests are independent
+        # and most of the time is spent waiting on the API. Progress messages from
+        # the fetchers may interleave in the console while they run.
+        with ThreadPoolExecutor(max_workers=len(fetchers)) as executor:
+            futures = {name: executor.submit(fetch, years) for name, fetch in fetchers.items()}
+            results = {name: future.result() for name, future in futures.items()}
+
         return results
 
+    def _get_cached(self, name, years):
+        """
+        Get cached indicator data covering the given years
+
+        Args:
+            name: Indicator name used as cache key
+            years: List of years the data must cover
+
+        Returns:
+            DataFrame limited to the given years, or None if not cached
+        """
+        years_str = frozenset(str(year) for year in years)
+
+        with self._cache_lock:
+            cached = dict(self.cache)
+
+        if (name, years_str) in cached:
+            return cached[(name, years_str)]
+
+        # Reuse data fetched for a superset of the requested years
+        for (cached_name, cached_years), df in cached.items():
+            if cached_name == name and df is not None and years_str <= cached_years:
+                return self._filter_cached(df, years_str)
+
+        return None
+
+    @staticmethod
+    def _filter_cached(df, years):
+        """
+        Select the rows of a cached DataFrame for the given years
+
+        Args:
+            df: Cached DataFrame with an 'ar' column
+            years: List of years to keep
+
+        Returns:
+            DataFrame with only the rows for the given years
+        """
+        years_str = [str(year) for year in years]
+        filtered_df = df[df['ar'].astype(str).isin(years_str)].copy()
+
+        # Drop categories (e.g. years) that are no longer present after slicing
+        for col in filtered_df.select_dtypes(include="category").columns:
+            filtered_df[col] = filtered_df[col].cat.remove_unused_categories()
+
+        return filtered_df
+
     def calculate_socioeconomic_index(self, years):
         """
         Calculate socioeconomic index for DeSO regions based on the three indicators
@@ -266,50 +428,58 @@ class DesoAnalyzer:
         Returns:
             DataFrame with calculated socioeconomic index
         """
-        # Fetch all indicators if not already in cache
-        if not all(k in self.cache for k in ["educational_level", "economic_standard", "unemployment_rate"]):
-            self.fetch_all_indicators(years)
-        
-        # Get DataFrames from cache
-        education_df = self.cache.get("educational_level")
-        economic_df = self.cache.get("economic_standard")
-        unemployment_df = self.cache.get("unemployment_rate")
+        indicators = ["educational_level", "economic_standard", "unemployment_rate"]
+
+        # Get DataFrames from cache, including frames fetched for a wider set of years
+        results = {k: self._get_cached(k, years) for k in indicators}
+
+        # Fetch missing indicators - fetchers return cached data where it is available
+        if any(df is None for df in results.values()):
+            results = self.fetch_all_indicators(years)
+
+        education_df = results["educational_level"]
+        economic_df = results["economic_standard"]
+        unemployment_df = results["unemployment_rate"]
     
         # Check if all data is available
         if education_df is None or economic_df is None or unemployment_df is None:
             print("Error: Missing data for index calculation")
             return None
         
-        # Prepare for merging - select only necessary columns
-        education_df = education_df[["region_code", "region", "ar", "education_percentage"]]
-        economic_df = economic_df[["region_code", "region", "ar", "low_economic_standard_percentage"]]
-        unemployment_df = unemployment_df[["region_code", "region", "ar", "unemployment_rate_percentage"]]
-    
-        # Merge all three indicators on region_code and year
-        merged_df = pd.merge(
-            education_df, 
-        economic_df, 
-            on=["region_code", "region", "ar"],
-            how="inner"
-        )
-    
-        merged_df = pd.merge(
-            merged_df,
-            unemployment_df,
-            on=["region_code", "region", "ar"],
-            how="inner"
+        # Align the three indicators on region_code and year; region_code already
+        # identifies the region, so the region name is not needed as a key
+        key = ["region_code", "ar"]
+        indicator_series = []
+        for df, col in [
+            (education_df, "education_percentage"),
+            (economic_df, "low_economic_standard_percentage"),
+            (unemployment_df, "unemployment_rate_percentage")
+        ]:
+            indicator = df.set_index(key)[col]
+
+            # Alignment needs a unique index, so average any duplicated areas
+            if not indicator.index.is_unique:
+                indicator = indicator.groupby(level=key, sort=False, observed=True).mean()
+
+            indicator_series.append(indicator)
+
+        merged_df = pd.concat(
+            indicator_series,
+            axis=1,
+            join="inner"  # Keep only areas with all three indicators
         )
-    
-        # Calculate socioeconomic index as the average of the three indicators
-        merged_df["socioeconomic_index"] = (
-            merged_df["education_percentage"] + 
-            merged_df["low_economic_standard_percentage"] + 
-            merged_df["unemployment_rate_percentage"]
-        ) / 3
-
-        # Rename region_code to deso and drop the duplicate region column
-        merged_df = merged_df.rename(columns={"region_code": "deso"})
-        merged_df = merged_df.drop(columns=["region"])
+
+        # Calculate socioeconomic index as the average of the three indicators,
+        # as one NumPy reduction over the contiguous (N, 3) float block
+        values = merged_df[[
+            "education_percentage",
+            "low_economic_standard_percentage",
+            "unemployment_rate_percentage"
+        ]].to_numpy(dtype=np.float64, na_value=np.nan)
+        merged_df["socioeconomic_index"] = values.mean(axis=1)
+
+        # Rename region_code to deso
+        merged_df = merged_df.reset_index().rename(columns={"region_code": "deso"})
     
         return merged_df
     
@@ -322,66 +492,71 @@ class DesoAnalyzer:
             index_df: DataFrame with calculated socioeconomic index
             
         Returns:
-            DataFrame with area type classifications and geographic information
+            DataFrame with area type classifications and geographic information.
+            The columns of index_df are shared rather than copied, so unless
+            pandas Copy-on-Write is enabled, modifying them in place also
+            modifies index_df
         """
-        from desocioek.codes import get_kommun_name, get_lan_name
+        from desocioek.codes import KOMMUN_DICT, LAN_DICT
 
-        result_df = index_df.copy()
+        # Shallow copy: new columns are added without touching index_df or
+        # duplicating its data
+        result_df = index_df.copy(deep=False)
 
-        # Group by year to calculate statistics for each year
-        for year, year_df in result_df.groupby("ar"):
-            # Calculate statistics for the year
-            mean = year_df["socioeconomic_index"].mean()
-            std = year_df["socioeconomic_index"].std()
-    
-            # Get mask for this year
-            year_mask = result_df["ar"] == year
-    
-            # Use DeSO statistics for boundaries
-            result_df.loc[year_mask, "area_type"] = result_df.loc[year_mask].apply(
-                lambda row: self._get_area_type(row["socioeconomic_index"], mean, std),
-                axis=1
-            )
+        # Calculate statistics for each year, broadcast back to every row
+        grp = result_df.groupby("ar", sort=False, observed=True)["socioeconomic_index"]
+        mean = grp.transform("mean").to_numpy()
+        std = grp.transform("std").to_numpy()
+        values = result_df["socioeconomic_index"].to_numpy()
+
+        # Use DeSO statistics for boundaries
+        result_df["area_type"] = self._get_area_type(values, mean, std)
         
-        # Add description of area type
-        result_df["area_type_description"] = result_df["area_type"].map({
-            1: "Områden med stora socioekonomiska utmaningar",
-            2: "Områden med socioekonomiska utmaningar",
-            3: "Socioekonomiskt blandade områden",
-            4: "Områden med goda socioekonomiska förutsättningar",
-            5: "Områden med mycket goda socioekonomiska förutsättningar"
-        })
+        # Add description of area type, as a categorical indexed by the area type codes
+        result_df["area_type_description"] = pd.Categorical.from_codes(
+            result_df["area_type"].to_numpy() - 1,
+            categories=AREA_TYPE_DESCRIPTIONS
+        )
 
         # Extract municipality and county codes from deso column
         # DeSO codes format: first 4 characters are municipality code, first 2 are county code
         if "deso" in result_df.columns:
+            kommun_codes = result_df["deso"].str[:4]
+
             # Add kommun (municipality) name
-            result_df["kommun"] = result_df["deso"].str[:4].apply(get_kommun_name)
-    
-            # Add län (county) name
-            result_df["lan"] = result_df["deso"].str[:2].apply(get_lan_name)
+            result_df["kommun"] = kommun_codes.map(KOMMUN_DICT).fillna("Unknown")
+
+            # Add län (county) name, reusing the municipality codes
+            result_df["lan"] = kommun_codes.str[:2].map(LAN_DICT).fillna("Unknown")
 
         return result_df
     
     def _get_area_type(self, index_value, mean, std):
         """
         Determine area type based on index value, mean, and standard deviation
-        
+
+        Works element-wise, so arrays of index values (with matching arrays
+        of per-row statistics) are classified in a single vectorized pass.
+
         Args:
-            index_value: Socioeconomic index value
+            index_value: Socioeconomic index value or array of values
             mean: Mean of socioeconomic index
             std: Standard deviation of socioeconomic index
-            
+
         Returns:
-            Area type (1-5)
+            Area type (1-5), or an int8 array of area types for array input
         """
-        if index_value >= mean + 2*std:
-            return 1  # Areas with major socioeconomic challenges
-        elif index_value >= mean + std:
-            return 2  # Areas with socioeconomic challenges
-        elif index_value >= mean:
-            return 3  # Socioeconomically mixed areas
-        elif index_value >= mean - std:
-            return 4  # Areas with good socioeconomic conditions
-        else:
-            return 5  # Areas with very good socioeconomic conditions
\ No newline at end of file
+        area_type = np.select(
+            [
+                index_value >= mean + 2*std,  # Areas with major socioeconomic challenges
+                index_value >= mean + std,    # Areas with socioeconomic challenges
+                index_value >= mean,          # Socioeconomically mixed areas
+                index_value >= mean - std     # Areas with good socioeconomic conditions
+            ],
+            [1, 2, 3, 4],
+            default=5  # Areas with very good socioeconomic conditions
+        ).astype(np.int8)
+
+        if area_type.ndim == 0:
+            return int(area_type)
+        return area_type
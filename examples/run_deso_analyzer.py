@@ -28,13 +28,13 @@ if index_df is not None:
     
     # Get summary statistics by area type
     print("\nSummary by area type:")
-    area_type_summary = classified_df.groupby(['ar', 'area_type']).agg({
+    area_type_summary = classified_df.groupby(['ar', 'area_type'], observed=True).agg({
         'deso': 'count',  # Changed from region_code to deso
         'socioeconomic_index': ['mean', 'min', 'max']
     })
     print(area_type_summary)
     
     # Save the classified results
-    classified_file = "deso_area_classifications.csv"
-    classified_df.to_csv(classified_file, index=False)
+    classified_file = "deso_area_classifications.parquet"
+    classified_df.to_parquet(classified_file, index=False, compression="zstd")
     print(f"\nClassification results saved to {classified_file}")
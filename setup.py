@@ -5,11 +5,12 @@ setup(
     version="0.1.0",
     packages=find_packages(),
     install_requires=[
-        "pandas",
+        "pandas>=2.0",
         "numpy",
+        "pyarrow",
         "pxstatspy",
     ],
-    python_requires=">=3.7",
+    python_requires=">=3.8",
     author="Emanuel Raptis",
     description="A package for analyzing socioeconomic data at DeSO level",
     long_description=open("README.md").read() if "README.md" else "",
@@ -84,7 +84,7 @@ def test_area_classification():
             print(classified_df.head(2))
             
             # Print distribution of area types
-            type_counts = classified_df.groupby(['ar', 'area_type']).size().reset_index(name='count')
+            type_counts = classified_df.groupby(['ar', 'area_type'], observed=True).size().reset_index(name='count')
             print("\nDistribution of area types:")
             print(type_counts)
             return True
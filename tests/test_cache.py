@@ -0,0 +1,129 @@
+"""
+Offline tests for the DesoAnalyzer caches, using a stubbed SCB client
+instead of the live API.
+"""
+
+import tempfile
+from unittest import mock
+
+import pandas as pd
+
+from desocioek.deso_analyzer import DesoAnalyzer
+
+REGIONS = ["0114A0010", "0180C1010", "1280C1020"]
+
+
+class StubClient:
+    """Stand-in for PxAPI returning small DeSO tables and counting calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_data_as_dataframe(self, table_id, value_codes, region_type=None, clean_colnames=False):
+        self.calls += 1
+        rows = []
+        for year in value_codes["Tid"]:
+            for i, region_code in enumerate(REGIONS):
+                base = {"region_code": region_code, "region": f"Område {i}", "ar": year}
+                if table_id == "TAB5956":
+                    rows.append({**base, "utbildningsniva": "förgymnasial utbildning", "befolkning": 10 + i})
+                    rows.append({**base, "utbildningsniva": "gymnasial utbildning", "befolkning": 90 - i})
+                elif table_id == "TAB6436":
+                    rows.append({**base, "alder": "totalt", "andel_med_lag_ekonomisk_standard_procent": 5.0 * (i + 1)})
+                else:
+                    rows.append({**base, "kon": "totalt", "alder": "20-64 år",
+                                 "antal_arbetslosa": 5 + i,
+                                 "antal_sysselsatta_och_arbetslosa_arbetskraften": 100})
+        return pd.DataFrame(rows)
+
+
+def make_analyzer(**kwargs):
+    """Create a DesoAnalyzer wired to a StubClient"""
+    with mock.patch("desocioek.deso_analyzer.PxAPI"):
+        analyzer = DesoAnalyzer(**kwargs)
+    analyzer.client = StubClient()
+    return analyzer
+
+
+def test_disk_cache_reuses_responses():
+    """Test that a second analyzer loads responses from the disk cache"""
+    print("\n----- TESTING DISK CACHE -----")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        first = make_analyzer(cache_dir=cache_dir)
+        first_df = first.fetch_educational_level([2021, 2020])
+        assert first.client.calls == 1
+        assert [path.suffix for path in first.cache_dir.iterdir()] == [".parquet"]
+
+        # Same years in a different order must hit the same cache entry
+        second = make_analyzer(cache_dir=cache_dir)
+        second_df = second.fetch_educational_level([2020, 2021])
+        assert second.client.calls == 0
+
+        pd.testing.assert_frame_equal(
+            first_df.sort_values(["region_code", "ar"]).reset_index(drop=True),
+            second_df.sort_values(["region_code", "ar"]).reset_index(drop=True),
+            check_categorical=False
+        )
+    print("✓ Success! Second run made no API calls")
+
+
+def test_disk_cache_disabled():
+    """Test that use_disk_cache=False always calls the API"""
+    print("\n----- TESTING DISABLED DISK CACHE -----")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for _ in range(2):
+            analyzer = make_analyzer(use_disk_cache=False, cache_dir=cache_dir)
+            analyzer.fetch_economic_standard([2023])
+            assert analyzer.client.calls == 1
+    print("✓ Success! Every analyzer fetched from the API")
+
+
+def test_memory_cache_slices_superset():
+    """Test that a subset of cached years is sliced instead of fetched"""
+    print("\n----- TESTING MEMORY CACHE SUBSET -----")
+    analyzer = make_analyzer(use_disk_cache=False)
+    full_df = analyzer.calculate_socioeconomic_index([2020, 2021, 2022])
+    assert analyzer.client.calls == 3
+    assert len(full_df) == 3 * len(REGIONS)
+
+    index_df = analyzer.calculate_socioeconomic_index([2021])
+    assert analyzer.client.calls == 3
+    assert index_df["ar"].astype(str).unique().tolist() == ["2021"]
+    assert index_df["ar"].cat.categories.tolist() == ["2021"]
+
+    expected = full_df[full_df["ar"].astype(str) == "2021"]
+    pd.testing.assert_series_equal(
+        index_df.sort_values("deso")["socioeconomic_index"].reset_index(drop=True),
+        expected.sort_values("deso")["socioeconomic_index"].reset_index(drop=True)
+    )
+
+    # Individual fetchers reuse the superset as well
+    unemployment_df = analyzer.fetch_unemployment_rate([2022, 2020])
+    assert analyzer.client.calls == 3
+    assert sorted(unemployment_df["ar"].astype(str).unique()) == ["2020", "2022"]
+
+    # Years outside the cached set still trigger a fetch
+    analyzer.fetch_economic_standard([2023])
+    assert analyzer.client.calls == 4
+    print("✓ Success! Subsets of cached years made no API calls")
+
+
+if __name__ == "__main__":
+    print("Running cache tests...")
+
+    tests = [
+        test_disk_cache_reuses_responses,
+        test_disk_cache_disabled,
+        test_memory_cache_slices_superset
+    ]
+
+    failed = []
+    for test_func in tests:
+        try:
+            test_func()
+        except AssertionError:
+            print(f"✗ {test_func.__name__} failed")
+            failed.append(test_func.__name__)
+
+    print("\n----- TEST SUMMARY -----")
+    print(f"Tests passed: {len(tests) - len(failed)}/{len(tests)}")
@@ -0,0 +1,59 @@
+"""
+Offline tests for DesoAnalyzer.classify_area_types, checked against the
+scalar boundary rules of the original implementation.
+"""
+
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from desocioek.deso_analyzer import DesoAnalyzer
+
+
+def reference_area_type(index_value, mean, std):
+    """Scalar area type rules as originally applied row by row"""
+    if index_value >= mean + 2*std:
+        return 1
+    elif index_value >= mean + std:
+        return 2
+    elif index_value >= mean:
+        return 3
+    elif index_value >= mean - std:
+        return 4
+    else:
+        return 5
+
+
+def make_analyzer():
+    """Create a DesoAnalyzer without contacting the API"""
+    with mock.patch("desocioek.deso_analyzer.PxAPI"):
+        return DesoAnalyzer(use_disk_cache=False)
+
+
+def test_missing_values_match_reference():
+    """Test that NaN index values and NaN standard deviations classify like the original rules"""
+    print("\n----- TESTING MISSING VALUES IN CLASSIFICATION -----")
+    index_df = pd.DataFrame({
+        "deso": ["0114A0010", "0114A0020", "0180C1010", "0180C1020", "1280C1020", "2480C1010"],
+        # 2022 has a single area, so its standard deviation is NaN
+        "ar": ["2021", "2021", "2021", "2021", "2021", "2022"],
+        "socioeconomic_index": [10.0, np.nan, 20.0, 30.0, 45.0, 15.0]
+    })
+
+    classified_df = make_analyzer().classify_area_types(index_df)
+
+    for year, year_df in index_df.groupby("ar"):
+        mean = year_df["socioeconomic_index"].mean()
+        std = year_df["socioeconomic_index"].std()
+        expected = [reference_area_type(value, mean, std) for value in year_df["socioeconomic_index"]]
+        actual = classified_df.loc[year_df.index, "area_type"].tolist()
+        assert actual == expected, f"{year}: {actual} != {expected}"
+
+    # A missing index value gets the last area type, never 1
+    assert classified_df.loc[1, "area_type"] == 5
+    print("✓ Success! Missing values classified like the original rules")
+
+
+if __name__ == "__main__":
+    test_missing_values_match_reference()